@@ -8,12 +8,8 @@
 # *******************************************************
 
 import streamlit as st  # Importer la bibliothèque Streamlit pour créer des applications web interactives
-from PIL import Image, ExifTags  # Importer le module Image de PIL (Pillow) pour manipuler les images et ExifTags pour accéder aux tags EXIF
-from PIL.ExifTags import TAGS, GPSTAGS  # Importer les dictionnaires TAGS et GPSTAGS de PIL pour traduire les identifiants de tags EXIF en noms lisibles
-import folium  # Importer la bibliothèque Folium pour créer des cartes interactives
-from streamlit_folium import folium_static  # Importer la fonction folium_static de streamlit_folium pour afficher des cartes Folium dans une application Streamlit
-import piexif  # Importer la bibliothèque piexif pour manipuler les métadonnées EXIF des images
 import io  # Importer le module io pour travailler avec les flux de données en mémoire
+# Pillow, piexif et Folium sont importés à la demande, seulement lorsque les sections qui les utilisent sont affichées
 
 # Dictionnaires pour traduire les valeurs EXIF en descriptions compréhensibles
 options_orientation = {
@@ -93,6 +89,7 @@ def convertir_de_coord_exif(coords, ref):
 
 # Fonction pour extraire les métadonnées EXIF d'une image
 def obtenir_donnees_exif(image):
+    from PIL.ExifTags import TAGS  # Importer le dictionnaire TAGS de PIL pour traduire les identifiants de tags EXIF en noms lisibles
     donnees_exif = image._getexif()  # Utilise la méthode _getexif() pour obtenir les métadonnées EXIF de l'image
     if not donnees_exif:  # Vérifie si les métadonnées EXIF sont présentes
         return {}  # Si aucune métadonnée n'est trouvée, retourne un dictionnaire vide
@@ -108,11 +105,14 @@ st.title("Éditeur de métadonnées EXIF")  # Titre de l'application Streamlit
 fichier_charge = st.file_uploader("Choisissez une image...", type=["jpg", "jpeg"])  # Créer un widget pour uploader un fichier image
 
 if fichier_charge is not None:  # Si un fichier est chargé
+    from PIL import Image  # Importer le module Image de PIL (Pillow) pour manipuler les images
     image = Image.open(fichier_charge)  # Ouvrir l'image en utilisant PIL
     donnees_exif = obtenir_donnees_exif(image)  # Obtenir les données EXIF de l'image
     if not donnees_exif:  # Si aucune donnée EXIF n'est trouvée
         st.write("Pas de métadonnées EXIF trouvées dans l'image.")  # Afficher un message indiquant qu'aucune donnée EXIF n'est trouvée
     else:
+        import piexif  # Importer la bibliothèque piexif pour manipuler les métadonnées EXIF des images
+
         st.image(image, caption='Image chargée', use_column_width=True)  # Afficher l'image chargée
         st.write("**Métadonnées EXIF :**")  # Afficher un titre pour les métadonnées EXIF
         st.write(donnees_exif)  # Afficher les données EXIF
@@ -224,8 +224,12 @@ if fichier_charge is not None:  # Si un fichier est chargé
                 )
             st.success("Les métadonnées ont été modifiées avec succès!")
 
-        # Afficher la carte avec les coordonnées GPS modifiées
-        st.subheader("Carte des coordonnées GPS")
-        m = folium.Map(location=[lat, lon], zoom_start=15)
-        folium.Marker([lat, lon], tooltip='Coordonnées GPS').add_to(m)
-        folium_static(m)
+        # Afficher la carte avec les coordonnées GPS modifiées (seulement si des coordonnées sont renseignées)
+        if lat or lon:
+            import folium  # Importer la bibliothèque Folium pour créer des cartes interactives
+            from streamlit_folium import folium_static  # Importer la fonction folium_static de streamlit_folium pour afficher des cartes Folium dans une application Streamlit
+
+            st.subheader("Carte des coordonnées GPS")
+            m = folium.Map(location=[lat, lon], zoom_start=15)
+            folium.Marker([lat, lon], tooltip='Coordonnées GPS').add_to(m)
+            folium_static(m)
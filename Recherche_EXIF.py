@@ -0,0 +1,288 @@
+# *******************************************************
+# Nom ......... : Recherche_EXIF.py
+# Rôle ........ : Recherche et filtrage des métadonnées EXIF d'un dossier ou d'une archive d'images
+# Auteur ...... : Maxim Khomenko
+# Version ..... : V1.0.0 du 31/05/2024
+# Licence ..... : Réalisé dans le cadre du cours de l'Architecture des Machines
+# Usage ....... : Exécuter le script avec "streamlit run Recherche_EXIF.py" pour démarrer l'application
+# *******************************************************
+
+import streamlit as st  # Importer la bibliothèque Streamlit pour créer des applications web interactives
+from datetime import datetime, time, timezone  # Importer les types de dates pour convertir les dates EXIF en horodatages
+import math  # Importer le module math pour représenter les valeurs absentes (NaN)
+import os  # Importer le module os pour parcourir les dossiers d'images
+import time as chrono  # Importer le module time pour mesurer la durée des requêtes
+import zipfile  # Importer le module zipfile pour lire les archives d'images
+# Pillow et NumPy sont importés à la demande, seulement lors de l'indexation et de la recherche
+
+# Extensions des fichiers images pris en charge
+extensions_images = (".jpg", ".jpeg")
+
+# Configuration du serveur (variables d'environnement)
+dossier_racine = os.environ.get("EXIF_DOSSIER_RACINE", "")  # Seuls les dossiers situés sous cette racine peuvent être indexés (désactivé si vide)
+max_index = int(os.environ.get("EXIF_MAX_INDEX", "4"))  # Nombre maximal d'index conservés en mémoire
+
+# Options du filtre sur la présence de coordonnées GPS
+options_gps = {
+    0: "Toutes les photos",
+    1: "Avec coordonnées GPS",
+    2: "Sans coordonnées GPS",
+}
+
+# Fonction pour extraire les métadonnées EXIF d'une image
+def obtenir_donnees_exif(image):
+    from PIL.ExifTags import TAGS  # Importer le dictionnaire TAGS de PIL pour traduire les identifiants de tags EXIF en noms lisibles
+    donnees_exif = image._getexif()  # Utilise la méthode _getexif() pour obtenir les métadonnées EXIF de l'image
+    if not donnees_exif:  # Vérifie si les métadonnées EXIF sont présentes
+        return {}  # Si aucune métadonnée n'est trouvée, retourne un dictionnaire vide
+
+    exif = {}  # Initialise un dictionnaire pour stocker les métadonnées EXIF avec des noms de tags lisibles
+    for tag, value in donnees_exif.items():  # Parcourt chaque tag et sa valeur dans les métadonnées EXIF
+        nom_tag = TAGS.get(tag, tag)  # Utilise la table de correspondance TAGS pour obtenir un nom lisible du tag. Si le tag n'est pas trouvé, utilise le tag lui-même
+        exif[nom_tag] = value  # Ajoute le nom du tag et sa valeur au dictionnaire EXIF
+    return exif  # Retourne le dictionnaire des métadonnées EXIF
+
+# Fonction pour convertir une valeur EXIF (texte ou octets) en chaîne nettoyée
+def convertir_en_texte(valeur):
+    if isinstance(valeur, bytes):  # Les chaînes EXIF peuvent être stockées sous forme d'octets
+        valeur = valeur.decode('utf-8', errors='ignore')
+    return str(valeur).strip('\x00 ') if valeur is not None else ""  # Supprime les octets nuls et les espaces de fin
+
+# Fonction pour convertir une valeur EXIF numérique (rationnel, tuple ou entier) en nombre décimal
+def convertir_en_nombre(valeur):
+    if isinstance(valeur, (tuple, list)):  # Certains appareils stockent l'ISO sous forme de liste
+        valeur = valeur[0] if valeur else None
+    try:
+        return float(valeur)  # Les rationnels EXIF de Pillow (IFDRational) se convertissent directement
+    except (TypeError, ValueError, ZeroDivisionError):
+        return math.nan  # Valeur absente ou illisible
+
+# Fonction pour convertir une date EXIF ("AAAA:MM:JJ HH:MM:SS") en horodatage
+def convertir_date_exif(valeur):
+    try:
+        date = datetime.strptime(convertir_en_texte(valeur)[:19], "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return math.nan  # Date absente ou mal formée
+    return date.replace(tzinfo=timezone.utc).timestamp()  # Horodatage en secondes, sans décalage horaire
+
+# Fonction pour lire une ligne de l'index à partir d'un fichier image (seul l'en-tête est lu, pas les pixels)
+def lire_ligne_exif(nom, fichier):
+    from PIL import Image  # Importer le module Image de PIL (Pillow) pour lire les en-têtes des images
+    try:
+        with Image.open(fichier) as image:
+            exif = obtenir_donnees_exif(image)
+    except Exception:
+        exif = {}  # Fichier illisible : la photo reste dans l'index, sans métadonnées
+    gps = exif.get("GPSInfo")
+    gps = gps if isinstance(gps, dict) else {}
+    return (
+        nom,
+        convertir_en_texte(exif.get("Make")),
+        convertir_en_texte(exif.get("Model")),
+        convertir_en_texte(exif.get("LensModel")),
+        convertir_en_nombre(exif.get("ISOSpeedRatings")),
+        convertir_en_nombre(exif.get("ExposureTime")),
+        convertir_date_exif(exif.get("DateTimeOriginal", exif.get("DateTime"))),
+        2 in gps and 4 in gps,  # GPSLatitude (2) et GPSLongitude (4) doivent être présents
+    )
+
+# Fonction pour construire l'index colonne par colonne à partir des lignes lues
+def construire_index(lignes):
+    import numpy as np  # Importer NumPy pour stocker l'index sous forme de tableaux colonnes en mémoire
+    lignes = list(lignes)
+    colonnes = list(zip(*lignes)) if lignes else [()] * 8
+    index = {"nombre": len(lignes), "nom": np.array(colonnes[0], dtype=object)}
+
+    # Les colonnes textuelles sont encodées en codes entiers avec leur vocabulaire trié
+    for position, cle in ((1, "fabricant"), (2, "modele"), (3, "objectif")):
+        vocabulaire, codes = np.unique(np.array(colonnes[position], dtype=object), return_inverse=True)
+        index[cle] = codes.astype(np.int32)
+        index[cle + "_vocabulaire"] = vocabulaire.tolist()
+
+    # Les colonnes numériques sont stockées en tableaux float64 (NaN pour les valeurs absentes)
+    index["iso"] = np.array(colonnes[4], dtype=np.float64)
+    index["exposition"] = np.array(colonnes[5], dtype=np.float64)
+    index["date"] = np.array(colonnes[6], dtype=np.float64)
+    index["gps"] = np.array(colonnes[7], dtype=bool)
+
+    # Valeurs distinctes des temps d'exposition, proposées par le curseur (quelques dizaines de vitesses)
+    index["exposition_valeurs"] = np.unique(index["exposition"][np.isfinite(index["exposition"])]).tolist()
+    return index
+
+# Fonction pour résoudre un chemin saisi par l'utilisateur, retourne None s'il sort du dossier racine
+def resoudre_chemin(chemin):
+    racine = os.path.realpath(dossier_racine)
+    chemin = os.path.realpath(os.path.join(racine, chemin))  # Les liens symboliques et les ".." sont résolus
+    if os.path.commonpath([racine, chemin]) != racine:
+        return None
+    return chemin
+
+# Fonction pour obtenir les générations d'index des dossiers, partagées par toutes les sessions du serveur
+@st.cache_resource
+def obtenir_generations():
+    return {}
+
+# Fonction pour indexer toutes les images d'un dossier (mise en cache : les fichiers ne sont lus qu'une fois par génération)
+@st.cache_resource(max_entries=max_index, show_spinner="Indexation du dossier...")
+def indexer_dossier(chemin, generation):
+    chemins = []
+    for racine, _, fichiers in os.walk(chemin):  # Parcourt le dossier et ses sous-dossiers
+        for fichier in fichiers:
+            if fichier.lower().endswith(extensions_images):
+                chemins.append(os.path.join(racine, fichier))
+    chemins.sort()
+    return construire_index(lire_ligne_exif(os.path.relpath(c, chemin), c) for c in chemins)
+
+# Fonction pour indexer toutes les images d'une archive ZIP (mise en cache selon l'identifiant du fichier chargé)
+@st.cache_resource(max_entries=max_index, show_spinner="Indexation de l'archive...")
+def indexer_archive(identifiant, _archive):
+    lignes = []
+    _archive.seek(0)
+    with zipfile.ZipFile(_archive) as archive:
+        noms = sorted(n for n in archive.namelist() if n.lower().endswith(extensions_images))
+        for nom in noms:
+            with archive.open(nom) as fichier:
+                lignes.append(lire_ligne_exif(nom, fichier))
+    return construire_index(lignes)
+
+# Fonction pour filtrer l'index et retourner les positions des photos correspondantes
+def filtrer_index(index, criteres):
+    import numpy as np  # Importer NumPy pour stocker l'index sous forme de tableaux colonnes en mémoire
+    masque = np.ones(index["nombre"], dtype=bool)
+
+    # Filtres sur les valeurs textuelles : comparaison des codes entiers, sans manipuler de chaînes
+    for cle in ("fabricant", "modele", "objectif"):
+        valeurs = criteres.get(cle)
+        if valeurs:
+            # Table de correspondance code -> sélectionné, appliquée en une seule indexation du tableau
+            selection = set(valeurs)
+            table = np.array([v in selection for v in index[cle + "_vocabulaire"]], dtype=bool)
+            masque &= table[index[cle]]
+
+    # Filtres sur les intervalles numériques (les valeurs absentes sont exclues dès qu'un intervalle est choisi)
+    for cle in ("iso", "exposition", "date"):
+        intervalle = criteres.get(cle)
+        if intervalle is not None:
+            colonne = index[cle]
+            masque &= (colonne >= intervalle[0]) & (colonne <= intervalle[1])
+
+    # Filtre sur la présence de coordonnées GPS
+    gps = criteres.get("gps", 0)
+    if gps == 1:
+        masque &= index["gps"]
+    elif gps == 2:
+        masque &= ~index["gps"]
+
+    return np.flatnonzero(masque)
+
+# Fonction pour afficher le filtre sur l'ISO, retourne None si le filtre est inactif
+def filtre_iso(colonne):
+    import numpy as np  # Importer NumPy pour stocker l'index sous forme de tableaux colonnes en mémoire
+    if not np.isfinite(colonne).any():  # Aucune valeur disponible pour cette colonne
+        return None
+    minimum, maximum = int(np.nanmin(colonne)), int(np.nanmax(colonne))
+    if minimum == maximum:
+        return None
+    intervalle = st.slider("ISO", min_value=minimum, max_value=maximum, value=(minimum, maximum), step=1)
+    return None if intervalle == (minimum, maximum) else intervalle  # Intervalle complet : pas de filtrage
+
+# Fonction pour formater un temps d'exposition comme sur un appareil photo (1/250, 2 s...)
+def formater_exposition(valeur):
+    return f"1/{round(1 / valeur)}" if 0 < valeur < 1 else f"{valeur:g} s"
+
+# Fonction pour afficher le filtre sur le temps d'exposition, retourne None si le filtre est inactif
+def filtre_exposition(valeurs):
+    if len(valeurs) < 2:
+        return None
+    # Le curseur propose les vitesses présentes dans l'index plutôt qu'un pas fixe, qui confondrait 1/250 et 1/4000
+    intervalle = st.select_slider("Temps d'exposition", options=valeurs, value=(valeurs[0], valeurs[-1]), format_func=formater_exposition)
+    return None if intervalle == (valeurs[0], valeurs[-1]) else intervalle  # Intervalle complet : pas de filtrage
+
+# Fonction pour afficher le filtre sur les dates, retourne None si le filtre est inactif
+def filtre_dates(colonne):
+    import numpy as np  # Importer NumPy pour stocker l'index sous forme de tableaux colonnes en mémoire
+    if not np.isfinite(colonne).any():
+        return None
+    debut = datetime.fromtimestamp(float(np.nanmin(colonne)), tz=timezone.utc).date()
+    fin = datetime.fromtimestamp(float(np.nanmax(colonne)), tz=timezone.utc).date()
+    dates = st.date_input("Période de prise de vue", value=(debut, fin), min_value=debut, max_value=fin)
+    if len(dates) != 2 or tuple(dates) == (debut, fin):
+        return None
+    return (
+        datetime.combine(dates[0], time.min, tzinfo=timezone.utc).timestamp(),
+        datetime.combine(dates[1], time.max, tzinfo=timezone.utc).timestamp(),
+    )
+
+# Fonction pour formater une date de l'index pour l'affichage
+def formater_date(horodatage):
+    if math.isnan(horodatage):
+        return ""
+    return datetime.fromtimestamp(horodatage, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+# Interface utilisateur Streamlit
+st.title("Recherche dans les métadonnées EXIF")  # Titre de l'application Streamlit
+
+sources = ["Dossier", "Archive ZIP"] if dossier_racine else ["Archive ZIP"]  # Les dossiers ne sont proposés que si une racine est configurée
+source = st.radio("Source des photos", options=sources, horizontal=True)
+index = None
+if source == "Dossier":
+    chemin = st.text_input(f"Chemin du dossier (relatif à {dossier_racine})")
+    chemin_resolu = resoudre_chemin(chemin) if chemin else None
+    if chemin and (chemin_resolu is None or not os.path.isdir(chemin_resolu)):
+        st.error("Le dossier indiqué est introuvable.")
+    elif chemin:
+        generations = obtenir_generations()
+        if st.button("Réindexer le dossier"):  # Relit le dossier après l'ajout ou la suppression de photos, pour toutes les sessions
+            generations[chemin_resolu] = generations.get(chemin_resolu, 0) + 1
+        index = indexer_dossier(chemin_resolu, generations.get(chemin_resolu, 0))
+else:
+    archive_chargee = st.file_uploader("Choisissez une archive...", type=["zip"])
+    if archive_chargee is not None:
+        try:
+            index = indexer_archive(archive_chargee.file_id, archive_chargee)
+        except zipfile.BadZipFile:
+            st.error("Le fichier chargé n'est pas une archive ZIP valide.")
+
+if index is not None:
+    if index["nombre"] == 0:
+        st.write("Aucune image trouvée.")
+    else:
+        st.write(f"**{index['nombre']} photos indexées**")
+
+        # Formulaire de filtrage
+        st.subheader("Filtres")
+        criteres = {
+            "fabricant": st.multiselect("Fabricant", options=[v for v in index["fabricant_vocabulaire"] if v]),
+            "modele": st.multiselect("Modèle", options=[v for v in index["modele_vocabulaire"] if v]),
+            "objectif": st.multiselect("Modèle de l'objectif", options=[v for v in index["objectif_vocabulaire"] if v]),
+            "iso": filtre_iso(index["iso"]),
+            "exposition": filtre_exposition(index["exposition_valeurs"]),
+            "date": filtre_dates(index["date"]),
+            "gps": st.radio("GPS", options=list(options_gps.keys()), format_func=lambda x: options_gps[x], horizontal=True),
+        }
+
+        # Exécuter la requête sur l'index en mémoire
+        debut_requete = chrono.perf_counter()
+        resultats = filtrer_index(index, criteres)
+        duree_requete = (chrono.perf_counter() - debut_requete) * 1000
+        st.write(f"**{len(resultats)} résultats** ({duree_requete:.1f} ms)")
+
+        # Pagination des résultats
+        if len(resultats):
+            taille_page = st.selectbox("Résultats par page", options=[25, 50, 100, 250], index=1)
+            nombre_pages = (len(resultats) - 1) // taille_page + 1
+            page = st.number_input("Page", min_value=1, max_value=nombre_pages, value=1, step=1)
+            positions = resultats[(page - 1) * taille_page:page * taille_page]
+
+            # Seules les lignes de la page courante sont converties pour l'affichage
+            st.dataframe({
+                "Fichier": index["nom"][positions],
+                "Fabricant": [index["fabricant_vocabulaire"][c] for c in index["fabricant"][positions]],
+                "Modèle": [index["modele_vocabulaire"][c] for c in index["modele"][positions]],
+                "Objectif": [index["objectif_vocabulaire"][c] for c in index["objectif"][positions]],
+                "ISO": index["iso"][positions],
+                "Exposition (s)": index["exposition"][positions],
+                "Date": [formater_date(h) for h in index["date"][positions]],
+                "GPS": index["gps"][positions],
+            }, use_container_width=True)
+            st.caption(f"Page {page} sur {nombre_pages}")
@@ -0,0 +1,83 @@
+# *******************************************************
+# Nom ......... : mesurer_demarrage.py
+# Rôle ........ : Mesure du temps de démarrage à froid des applications et vérification du budget
+# Auteur ...... : Maxim Khomenko
+# Version ..... : V1.0.0 du 31/05/2024
+# Licence ..... : Réalisé dans le cadre du cours de l'Architecture des Machines
+# Usage ....... : Exécuter le script avec "python mesurer_demarrage.py [facteur]" (budget : facteur x durée d'une page Streamlit minimale, 1.5 par défaut)
+# *******************************************************
+
+import json  # Importer le module json pour échanger les mesures avec le processus enfant
+import os  # Importer le module os pour localiser les scripts des applications
+import subprocess  # Importer le module subprocess pour démarrer chaque application dans un interpréteur neuf
+import sys  # Importer le module sys pour lire les arguments et retourner le code de sortie
+
+# Applications mesurées
+applications = [
+    "photographie_EXIF_editeur.py",
+    "Editeur_EXIF_v1.1.0.py",
+    "Editeur_EXIF.py",
+    "Recherche_EXIF.py",
+]
+
+# Bibliothèques qui ne doivent pas être chargées au démarrage (aucune image chargée)
+modules_differes = ["folium", "streamlit_folium", "piexif"]
+
+# Nombre de mesures par application : la plus rapide est retenue pour limiter le bruit de la machine
+repetitions = 3
+
+# Code exécuté dans le processus enfant : exécute le script sans serveur Streamlit et mesure sa durée.
+# La référence est une page Streamlit minimale (titre et chargement de fichier), qui paie le même coût fixe que les applications.
+code_mesure = """
+import json, runpy, sys, time
+debut = time.perf_counter()
+if sys.argv[1] == "reference":
+    import streamlit as st
+    st.title("Référence")
+    st.file_uploader("Référence")
+else:
+    runpy.run_path(sys.argv[1], run_name="__main__")
+duree = (time.perf_counter() - debut) * 1000
+print(json.dumps({"duree": duree, "charges": [m for m in sys.argv[2:] if m in sys.modules]}))
+"""
+
+# Fonction pour mesurer le démarrage à froid d'une application dans un interpréteur neuf, retourne None si elle échoue
+def mesurer_application(chemin):
+    mesures = []
+    for _ in range(repetitions):
+        try:
+            resultat = subprocess.run(
+                [sys.executable, "-c", code_mesure, chemin] + modules_differes,
+                capture_output=True, text=True, check=True,
+            )
+        except subprocess.CalledProcessError as erreur:
+            print(f"{os.path.basename(chemin):32} échec du démarrage :")
+            print(erreur.stderr.strip())
+            return None
+        mesures.append(json.loads(resultat.stdout.strip().splitlines()[-1]))  # La dernière ligne contient les mesures
+    return min(mesures, key=lambda mesure: mesure["duree"])
+
+if __name__ == "__main__":
+    # Le budget est relatif à une page Streamlit minimale, mesurée sur la même machine et dans la même exécution
+    facteur = float(sys.argv[1]) if len(sys.argv) > 1 else float(os.environ.get("EXIF_FACTEUR_DEMARRAGE", "1.5"))
+    dossier = os.path.dirname(os.path.abspath(__file__))
+
+    reference = mesurer_application("reference")
+    if reference is None:
+        sys.exit(1)
+    budget = reference["duree"] * facteur
+    print(f"{'page minimale (référence)':32} {reference['duree']:8.1f} ms, budget {budget:.1f} ms (x{facteur:g})")
+    echec = False
+
+    for application in applications:
+        mesure = mesurer_application(os.path.join(dossier, application))
+        if mesure is None:
+            echec = True
+            continue
+        depassement = mesure["duree"] > budget
+        echec = echec or depassement or bool(mesure["charges"])
+        print(f"{application:32} {mesure['duree']:8.1f} ms {'BUDGET DÉPASSÉ' if depassement else 'ok'}")
+        if mesure["charges"]:
+            print(f"{'':32} modules chargés au démarrage : {', '.join(mesure['charges'])}")
+
+    sys.exit(1 if echec else 0)
@@ -0,0 +1,70 @@
+# *******************************************************
+# Nom ......... : mesurer_requetes.py
+# Rôle ........ : Mesure du temps de réponse des filtres de Recherche_EXIF.py sur un index synthétique
+# Auteur ...... : Maxim Khomenko
+# Version ..... : V1.0.0 du 31/05/2024
+# Licence ..... : Réalisé dans le cadre du cours de l'Architecture des Machines
+# Usage ....... : Exécuter le script avec "python mesurer_requetes.py [budget_ms] [nombre_photos]" (par défaut : 100 ms, 1 000 000 photos)
+# *******************************************************
+
+import os  # Importer le module os pour localiser le script de recherche
+import runpy  # Importer le module runpy pour charger les fonctions de Recherche_EXIF.py sans serveur Streamlit
+import statistics  # Importer le module statistics pour calculer la durée médiane des requêtes
+import sys  # Importer le module sys pour lire les arguments et retourner le code de sortie
+import time  # Importer le module time pour mesurer la durée des requêtes
+import numpy as np  # Importer NumPy pour générer les métadonnées synthétiques
+
+# Nombre d'exécutions mesurées (après une exécution de préchauffage)
+repetitions = 5
+
+# Fonction pour générer des lignes d'index synthétiques, au format retourné par lire_ligne_exif
+def generer_lignes(nombre):
+    generateur = np.random.default_rng(0)
+    fabricants = np.array(["Canon", "Nikon", "Sony", "Fujifilm", "Apple", ""], dtype=object)
+    modeles = np.array([f"Modèle {i}" for i in range(200)], dtype=object)
+    objectifs = np.array([f"Objectif {i}" for i in range(500)], dtype=object)
+    vitesses = 1 / np.array([8000, 4000, 2000, 1000, 500, 250, 125, 60, 30, 15, 8, 4, 2, 1, 0.5])
+
+    iso = generateur.choice([100, 200, 400, 800, 1600, 3200, 6400, np.nan], nombre)
+    exposition = generateur.choice(np.append(vitesses, np.nan), nombre)
+    dates = generateur.uniform(1.2e9, 1.7e9, nombre)
+    dates[generateur.random(nombre) < 0.05] = np.nan  # Quelques photos sans date
+    return zip(
+        (f"photo_{i:07d}.jpg" for i in range(nombre)),
+        fabricants[generateur.integers(0, len(fabricants), nombre)].tolist(),
+        modeles[generateur.integers(0, len(modeles), nombre)].tolist(),
+        objectifs[generateur.integers(0, len(objectifs), nombre)].tolist(),
+        iso.tolist(),
+        exposition.tolist(),
+        dates.tolist(),
+        (generateur.random(nombre) < 0.3).tolist(),
+    )
+
+if __name__ == "__main__":
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 100.0  # Budget par requête en millisecondes
+    nombre = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+
+    recherche = runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Recherche_EXIF.py"))
+    index = recherche["construire_index"](generer_lignes(nombre))
+
+    # Tous les filtres sont actifs
+    criteres = {
+        "fabricant": ["Canon", "Sony"],
+        "modele": [f"Modèle {i}" for i in range(0, 200, 3)],
+        "objectif": [f"Objectif {i}" for i in range(0, 500, 2)],
+        "iso": (200, 3200),
+        "exposition": (1 / 1000, 1 / 60),
+        "date": (1.3e9, 1.6e9),
+        "gps": 1,
+    }
+
+    recherche["filtrer_index"](index, criteres)  # Préchauffage
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        resultats = recherche["filtrer_index"](index, criteres)
+        durees.append((time.perf_counter() - debut) * 1000)
+
+    mediane = statistics.median(durees)
+    print(f"{nombre} photos, {len(resultats)} résultats : médiane {mediane:.1f} ms, maximum {max(durees):.1f} ms (budget {budget:.0f} ms)")
+    sys.exit(1 if mediane > budget else 0)
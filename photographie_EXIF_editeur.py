@@ -8,12 +8,22 @@
 # *******************************************************
 
 import streamlit as st  # Importer la bibliothèque Streamlit pour créer des applications web interactives
-from PIL import Image, ExifTags  # Importer le module Image de PIL (Pillow) pour manipuler les images et ExifTags pour accéder aux tags EXIF
-from PIL.ExifTags import TAGS, GPSTAGS  # Importer les dictionnaires TAGS et GPSTAGS de PIL pour traduire les identifiants de tags EXIF en noms lisibles
-import folium  # Importer la bibliothèque Folium pour créer des cartes interactives
-from streamlit_folium import folium_static  # Importer la fonction folium_static de streamlit_folium pour afficher des cartes Folium dans une application Streamlit
-import piexif  # Importer la bibliothèque piexif pour manipuler les métadonnées EXIF des images
 import io  # Importer le module io pour travailler avec les flux de données en mémoire
+import os  # Importer le module os pour lire la configuration du mode serveur
+import copy  # Importer le module copy pour copier les données EXIF partagées avant modification
+import hashlib  # Importer le module hashlib pour calculer l'empreinte du contenu des images
+import threading  # Importer le module threading pour limiter les traitements simultanés
+import time  # Importer le module time pour limiter la durée d'attente d'une réservation de mémoire
+from streamlit import runtime  # Importer le runtime de Streamlit pour savoir quelles sessions sont encore ouvertes
+from streamlit.runtime.scriptrunner import get_script_run_ctx  # Importer get_script_run_ctx pour identifier la session courante
+# Pillow, piexif et Folium sont importés à la demande, seulement lorsque les sections qui les utilisent sont affichées
+
+# Configuration du mode serveur (variables d'environnement)
+max_traitements = int(os.environ.get("EXIF_MAX_TRAITEMENTS", "4"))  # Nombre maximal de décodages/sauvegardes simultanés
+taille_cache = int(os.environ.get("EXIF_TAILLE_CACHE", "64"))  # Nombre maximal d'images analysées conservées en cache
+quota_session = int(os.environ.get("EXIF_QUOTA_SESSION_MO", "150")) * 1024 * 1024  # Mémoire maximale conservée par session : image chargée, aperçu et image modifiée (en octets)
+budget_processus = int(os.environ.get("EXIF_BUDGET_PROCESSUS_MO", "2048")) * 1024 * 1024  # Mémoire maximale du serveur : mémoire conservée par toutes les sessions et sauvegardes en cours (en octets)
+taille_apercu = 1600  # Taille maximale (en pixels) de l'aperçu affiché
 
 # Dictionnaires pour traduire les valeurs EXIF en descriptions compréhensibles
 options_orientation = {
@@ -93,6 +103,7 @@ def convertir_de_coord_exif(coords, ref):
 
 # Fonction pour extraire les métadonnées EXIF d'une image
 def obtenir_donnees_exif(image):
+    from PIL.ExifTags import TAGS  # Importer le dictionnaire TAGS de PIL pour traduire les identifiants de tags EXIF en noms lisibles
     donnees_exif = image._getexif()  # Utilise la méthode _getexif() pour obtenir les métadonnées EXIF de l'image
     if not donnees_exif:  # Vérifie si les métadonnées EXIF sont présentes
         return {}  # Si aucune métadonnée n'est trouvée, retourne un dictionnaire vide
@@ -103,29 +114,143 @@ def obtenir_donnees_exif(image):
         exif[nom_tag] = value  # Ajoute le nom du tag et sa valeur au dictionnaire EXIF
     return exif  # Retourne le dictionnaire des métadonnées EXIF
 
+# Fonction pour obtenir le sémaphore partagé par toutes les sessions du serveur
+@st.cache_resource
+def obtenir_limiteur():
+    return threading.BoundedSemaphore(max_traitements)
+
+# Fonction pour obtenir le budget mémoire partagé par toutes les sessions du serveur
+@st.cache_resource
+def obtenir_budget_memoire():
+    return {"condition": threading.Condition(), "sessions": {}, "reserve": 0}
+
+# Fonction pour calculer la mémoire utilisée sur le serveur (appelée avec la condition verrouillée)
+def memoire_utilisee(budget):
+    if runtime.exists():
+        for identifiant in list(budget["sessions"]):
+            if not runtime.get_instance().is_active_session(identifiant):
+                del budget["sessions"][identifiant]  # Session fermée : sa mémoire est rendue au budget
+    return sum(budget["sessions"].values()) + budget["reserve"]
+
+# Fonction pour réserver la mémoire d'une sauvegarde dans le budget du serveur, retourne False si la réservation est impossible
+def reserver_memoire(octets, delai=60):
+    budget = obtenir_budget_memoire()
+    if octets > budget_processus:  # La réservation ne pourra jamais être satisfaite
+        return False
+    fin = time.monotonic() + delai
+    with budget["condition"]:
+        while memoire_utilisee(budget) + octets > budget_processus:
+            restant = fin - time.monotonic()
+            if restant <= 0:
+                return False
+            budget["condition"].wait(min(restant, 1))  # Réveil régulier : la fermeture d'une session ne prévient pas les sessions en attente
+        budget["reserve"] += octets
+    return True
+
+# Fonction pour rendre au budget du serveur la mémoire réservée
+def liberer_memoire(octets):
+    budget = obtenir_budget_memoire()
+    with budget["condition"]:
+        budget["reserve"] -= octets
+        budget["condition"].notify_all()
+
+# Fonction pour enregistrer la mémoire conservée par la session, retourne False si le quota de la session ou le budget du serveur serait dépassé
+def occuper_memoire_session(cle, octets):
+    occupation = st.session_state.setdefault("memoire_session", {})
+    total = sum(v for k, v in occupation.items() if k != cle) + octets
+    if total > quota_session:
+        return False
+
+    contexte = get_script_run_ctx()
+    if contexte is not None:  # Hors serveur Streamlit, seul le quota de la session s'applique
+        budget = obtenir_budget_memoire()
+        with budget["condition"]:
+            autres = memoire_utilisee(budget) - budget["sessions"].get(contexte.session_id, 0)
+            if autres + total > budget_processus:
+                return False
+            budget["sessions"][contexte.session_id] = total
+            budget["condition"].notify_all()  # La mémoire de la session a pu diminuer
+    occupation[cle] = octets
+    return True
+
+# Fonction pour obtenir l'empreinte du contenu d'un fichier chargé (calculée une seule fois par fichier)
+def obtenir_empreinte(fichier):
+    empreintes = st.session_state.setdefault("empreintes", {})
+    if fichier.file_id not in empreintes:
+        empreintes.clear()  # Seule l'empreinte du fichier courant est conservée
+        empreintes[fichier.file_id] = hashlib.sha256(fichier.getbuffer()).hexdigest()
+    return empreintes[fichier.file_id]
+
+# Fonction pour analyser les métadonnées d'une image, partagée entre les sessions et dédupliquée par empreinte
+@st.cache_resource(max_entries=taille_cache, show_spinner=False)
+def analyser_image(empreinte, _fichier):
+    from PIL import Image, ImageOps  # Importer les modules Image et ImageOps de PIL (Pillow) pour lire l'image et créer l'aperçu
+    import piexif  # Importer la bibliothèque piexif pour manipuler les métadonnées EXIF des images
+    with obtenir_limiteur():  # Limite le nombre d'analyses simultanées
+        _fichier.seek(0)
+        with Image.open(_fichier) as image:
+            donnees_exif = obtenir_donnees_exif(image)
+            # Charger les métadonnées EXIF de l'image sous forme de dictionnaire (piexif.load(b"") échoue sur une image sans EXIF)
+            exif_dict = piexif.load(image.info["exif"]) if "exif" in image.info else {}
+
+            # Créer un aperçu réduit, décodé directement à échelle réduite par le décodeur JPEG
+            image.draft("RGB", (taille_apercu, taille_apercu))
+            apercu = ImageOps.exif_transpose(image).convert("RGB")
+        apercu.thumbnail((taille_apercu, taille_apercu))
+        with io.BytesIO() as sortie:
+            apercu.save(sortie, format="jpeg")
+            apercu = sortie.getvalue()
+
+    # Vérifier et initialiser les sections nécessaires des données EXIF
+    if "0th" not in exif_dict:
+        exif_dict["0th"] = {}  # Initialiser la section "0th" si elle n'existe pas
+    if "Exif" not in exif_dict:
+        exif_dict["Exif"] = {}  # Initialiser la section "Exif" si elle n'existe pas
+    if "GPS" not in exif_dict:
+        exif_dict["GPS"] = {}  # Initialiser la section "GPS" si elle n'existe pas
+    return donnees_exif, exif_dict, apercu
+
+# Fonction pour enregistrer l'image avec ses nouvelles métadonnées, retourne None si le serveur est saturé
+def sauvegarder_image(fichier, exif_bytes):
+    from PIL import Image  # Importer le module Image de PIL (Pillow) pour réencoder l'image
+    fichier.seek(0)
+    with Image.open(fichier) as image:  # Seul l'en-tête est lu pour estimer la mémoire nécessaire
+        travail = image.width * image.height * len(image.getbands()) + fichier.size  # Pixels décodés et image encodée
+
+    # La mémoire est réservée avant de prendre une place du limiteur, pour ne pas bloquer les analyses en attendant
+    if not reserver_memoire(travail):
+        return None
+    try:
+        with obtenir_limiteur():  # Limite le nombre de décodages simultanés
+            fichier.seek(0)
+            with Image.open(fichier) as image, io.BytesIO() as output:
+                image.save(output, format="jpeg", exif=exif_bytes)
+                return output.getvalue()
+    finally:
+        liberer_memoire(travail)
+
 # Interface utilisateur Streamlit
 st.title("Éditeur de métadonnées EXIF")  # Titre de l'application Streamlit
 fichier_charge = st.file_uploader("Choisissez une image...", type=["jpg", "jpeg"])  # Créer un widget pour uploader un fichier image
+st.session_state["memoire_session"] = {}  # L'aperçu et l'image modifiée sont comptés à nouveau à chaque exécution
+message_memoire = "Mémoire insuffisante : le quota de la session ou la capacité du serveur est atteint, veuillez réessayer plus tard."
 
-if fichier_charge is not None:  # Si un fichier est chargé
-    image = Image.open(fichier_charge)  # Ouvrir l'image en utilisant PIL
-    donnees_exif = obtenir_donnees_exif(image)  # Obtenir les données EXIF de l'image
+if not occuper_memoire_session("chargement", fichier_charge.size if fichier_charge is not None else 0):  # Si le fichier dépasse le quota de la session ou le budget du serveur
+    st.error(message_memoire)
+elif fichier_charge is not None:  # Si un fichier est chargé
+    import piexif  # Importer la bibliothèque piexif pour manipuler les métadonnées EXIF des images
+    donnees_exif, exif_partage, apercu = analyser_image(obtenir_empreinte(fichier_charge), fichier_charge)  # Obtenir les données EXIF de l'image depuis le cache partagé
     if not donnees_exif:  # Si aucune donnée EXIF n'est trouvée
         st.write("Pas de métadonnées EXIF trouvées dans l'image.")  # Afficher un message indiquant qu'aucune donnée EXIF n'est trouvée
     else:
-        st.image(image, caption='Image chargée', use_column_width=True)  # Afficher l'image chargée
+        if occuper_memoire_session("apercu", len(apercu)):
+            st.image(apercu, caption='Image chargée', use_column_width=True)  # Afficher l'aperçu partagé de l'image chargée
+        else:
+            st.error(message_memoire)
         st.write("**Métadonnées EXIF :**")  # Afficher un titre pour les métadonnées EXIF
         st.write(donnees_exif)  # Afficher les données EXIF
 
-        exif_dict = piexif.load(image.info.get("exif", b""))  # Charger les métadonnées EXIF de l'image sous forme de dictionnaire
-        
-        # Vérifier et initialiser les sections nécessaires des données EXIF
-        if "0th" not in exif_dict:
-            exif_dict["0th"] = {}  # Initialiser la section "0th" si elle n'existe pas
-        if "Exif" not in exif_dict:
-            exif_dict["Exif"] = {}  # Initialiser la section "Exif" si elle n'existe pas
-        if "GPS" not in exif_dict:
-            exif_dict["GPS"] = {}  # Initialiser la section "GPS" si elle n'existe pas
+        exif_dict = copy.deepcopy(exif_partage)  # Copier les données partagées pour ne pas modifier celles des autres sessions
 
         # Obtenir les valeurs EXIF actuelles ou définir des valeurs par défaut
         orientation_actuelle = exif_dict["0th"].get(piexif.ImageIFD.Orientation, 1)
@@ -213,22 +338,35 @@ if fichier_charge is not None:  # Si un fichier est chargé
 
             # Sauvegarder l'image avec les nouvelles métadonnées
             exif_bytes = piexif.dump(exif_dict)
-            with io.BytesIO() as output:
-                image.save(output, format="jpeg", exif=exif_bytes)
-                # Télécharger l'image modifiée
-                st.download_button(
-                    label="Télécharger l'image modifiée",
-                    data=output.getvalue(),
-                    file_name="modified_image.jpg",
-                    mime="image/jpeg"
-                )
-            st.success("Les métadonnées ont été modifiées avec succès!")
-
-        # Afficher la carte avec les coordonnées GPS modifiées
-        st.subheader("Carte des coordonnées GPS")
-        m = folium.Map(location=[lat, lon], zoom_start=15)
-        folium.Marker([lat, lon], tooltip='Coordonnées GPS').add_to(m)
-        folium_static(m)
+            if not occuper_memoire_session("telechargement", fichier_charge.size):  # L'image modifiée a une taille proche de l'image chargée
+                st.error(message_memoire)
+            else:
+                with st.spinner("Sauvegarde en attente..."):
+                    image_modifiee = sauvegarder_image(fichier_charge, exif_bytes)
+
+                if image_modifiee is None or not occuper_memoire_session("telechargement", len(image_modifiee)):
+                    occuper_memoire_session("telechargement", 0)
+                    st.error(message_memoire)
+                else:
+                    # Télécharger l'image modifiée
+                    st.download_button(
+                        label="Télécharger l'image modifiée",
+                        data=image_modifiee,
+                        file_name="modified_image.jpg",
+                        mime="image/jpeg"
+                    )
+                    st.success("Les métadonnées ont été modifiées avec succès!")
+
+        # Importer Folium pour les cartes (chargé seulement lorsque les cartes sont affichées)
+        import folium  # Importer la bibliothèque Folium pour créer des cartes interactives
+        from streamlit_folium import folium_static  # Importer la fonction folium_static de streamlit_folium pour afficher des cartes Folium dans une application Streamlit
+
+        # Afficher la carte avec les coordonnées GPS modifiées (seulement si des coordonnées sont renseignées)
+        if lat or lon:
+            st.subheader("Carte des coordonnées GPS")
+            m = folium.Map(location=[lat, lon], zoom_start=15)
+            folium.Marker([lat, lon], tooltip='Coordonnées GPS').add_to(m)
+            folium_static(m)
 
         # Points d'intérêt
         st.subheader("Lieux à visiter")